@@ -124,7 +124,10 @@ class Settings(BaseModel):
         :param incoming: The incoming model.
         :type incoming: BaseModel
         """
-        for field_name in self.model_fields:
-            if field_name in incoming.model_fields_set:
-                field_value = getattr(incoming, field_name)
-                setattr(self, field_name, field_value)
+        # only the fields explicitly set in the incoming model are relevant
+        for field_name in incoming.model_fields_set & SETTINGS_FIELDS:
+            setattr(self, field_name, getattr(incoming, field_name))
+
+
+SETTINGS_FIELDS = frozenset(Settings.model_fields)
+"""The names of the fields in :class:`Settings`."""
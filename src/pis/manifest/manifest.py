@@ -54,9 +54,9 @@ class Manifest:
 
     def _load_local(self) -> RootManifest | None:
         try:
-            manifest_str = self._local_path.read_text()
+            manifest_bytes = self._local_path.read_bytes()
             logger.info(f'local manifest read from {self._local_path}')
-            return self._validate(manifest_str)
+            return self._validate(manifest_bytes)
         except FileNotFoundError:
             logger.info(f'no local manifest found in {self._local_path}')
             return None
@@ -70,9 +70,10 @@ class Manifest:
             manifest.steps[step] = StepManifest(name=step)
         return manifest
 
-    def _validate(self, manifest_str: str) -> RootManifest:
+    def _validate(self, manifest_json: str | bytes) -> RootManifest:
         try:
-            return RootManifest().model_validate_json(manifest_str)
+            # pydantic parses bytes directly, no need to decode them into a str first
+            return RootManifest.model_validate_json(manifest_json)
         except ValidationError as e:
             raise PISCriticalError(f'error validating manifest: {e}')
 
@@ -61,7 +61,7 @@ def mocked_steps():
 def mocked_absolute_path():
     with patch('pis.manifest.manifest.absolute_path') as mock_absolute_path:
         mock_absolute_path.return_value = MagicMock(Path('path/to/manifest.json'))
-        mock_absolute_path.return_value.read_text.return_value = content_json
+        mock_absolute_path.return_value.read_bytes.return_value = content_json.encode()
         yield mock_absolute_path
 
 
@@ -105,7 +105,7 @@ def test_load_local_ok(
     assert m._revision == 0
     assert m._manifest.steps == manifest_steps
     mock_load_remote.assert_called_once()
-    mocked_absolute_path.return_value.read_text.assert_called_once()
+    mocked_absolute_path.return_value.read_bytes.assert_called_once()
 
 
 @patch('pis.manifest.manifest.Manifest._load_remote')
@@ -114,7 +114,7 @@ def test_load_local_ko(
     mocked_absolute_path,
 ):
     mock_load_remote.return_value = None
-    mocked_absolute_path.return_value.read_text.side_effect = FileNotFoundError()
+    mocked_absolute_path.return_value.read_bytes.side_effect = FileNotFoundError()
 
     m = Manifest()
 
@@ -123,7 +123,7 @@ def test_load_local_ko(
     assert m._revision == 0
     assert m._manifest.steps == new_manifest_steps
     mock_load_remote.assert_called_once()
-    mocked_absolute_path.return_value.read_text.assert_called_once()
+    mocked_absolute_path.return_value.read_bytes.assert_called_once()
 
 
 @patch('pis.manifest.manifest.Manifest._load_remote')
@@ -59,15 +59,18 @@ class StepReporter:
 
     def upsert_task_manifests(self, tasks: list['Task']):
         """Update the step manifest with new task manifests."""
+        # index the manifests by name once, instead of scanning them for every task
+        positions: dict[str, int] = {}
+        for i, t in enumerate(self._manifest.tasks):
+            positions.setdefault(t.name, i)
+
         for task in tasks:
-            inserted = False
-            for i, t in enumerate(self._manifest.tasks):
-                if t.name == task.name:
-                    self._manifest.tasks[i] = task._manifest
-                    self._manifest.resources.extend(task._resources)
-                    inserted = True
-                    break
-            if not inserted:
+            i = positions.get(task.name)
+            if i is not None:
+                self._manifest.tasks[i] = task._manifest
+                self._manifest.resources.extend(task._resources)
+            else:
+                positions[task.name] = len(self._manifest.tasks)
                 self._manifest.tasks.append(task._manifest)
 
 
@@ -33,6 +33,11 @@ def _execute(args):
     return _executor(task, func_name, abort)
 
 
+def _pool_size(tasks: list['Task']) -> int:
+    # forking more workers than there are tasks only adds startup time
+    return max(1, min(settings().pool, len(tasks)))
+
+
 class XPool(Pool):
     """Extended Pool class.
 
@@ -96,19 +101,19 @@ class Step(StepReporter):
     @report
     def _run(self, tasks: list['Task'], *, abort: Event) -> list['Task']:
         logger.info(f'running {len(task_definitions())} main tasks')
-        with XPool(settings().pool) as run_pool:
+        with XPool(_pool_size(tasks)) as run_pool:
             return run_pool.xmap('run', tasks, abort)
 
     @report
     def _validate(self, tasks: list['Task'], *, abort: Event) -> list['Task']:
         logger.info(f'validating {len(task_definitions())} main tasks')
-        with XPool(settings().pool) as validation_pool:
+        with XPool(_pool_size(tasks)) as validation_pool:
             return validation_pool.xmap('validate', tasks, abort)
 
     @report
     def _upload(self, tasks: list['Task'], *, abort: Event) -> list['Task']:
         logger.info(f'uploading {len(task_definitions())} main tasks')
-        with XPool(settings().pool) as upload_pool:
+        with XPool(_pool_size(tasks)) as upload_pool:
             return upload_pool.xmap('upload', tasks, abort)
 
     def execute(self):
@@ -1,17 +1,29 @@
 """Google Cloud Storage class."""
 
+import functools
+import os
 import re
 import sys
+from collections import defaultdict
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
+from threading import Lock
 
+import requests
 from google import auth
 from google.api_core.exceptions import GoogleAPICallError, PreconditionFailed
+from google.auth import compute_engine, environment_vars
 from google.auth import exceptions as auth_exceptions
-from google.auth.transport.requests import AuthorizedSession
+from google.auth.credentials import Credentials
+from google.auth.transport.requests import AuthorizedSession, Request
 from google.cloud import storage
 from google.cloud.exceptions import NotFound
+from google.cloud.storage import transfer_manager
+from google.resumable_media import DataCorruption, InvalidResponse
 from loguru import logger
+from requests.adapters import HTTPAdapter
 
 from pis.storage.remote_storage import RemoteStorage
 from pis.util.errors import NotFoundError, PreconditionFailedError, StorageError
@@ -21,6 +33,25 @@ GOOGLE_SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets',
 ]
 
+BUCKET_NAME_RE = re.compile(r'^[a-z0-9][a-z0-9-_.]{2,221}[a-z0-9]$')
+
+# threads used for bulk operations, gcs calls are latency bound so we can go over cpu count
+MAX_WORKERS = 16
+# connections kept open to gcs. the adapter does not block, threads over this limit still
+# get a connection, but it is closed after the request instead of being reused
+HTTP_POOL_SIZE = 64
+# files bigger than this are downloaded in slices of this size, in parallel
+DOWNLOAD_CHUNK_SIZE = 32 * 1024 * 1024
+# files bigger than this are uploaded in parts of this size, in parallel
+UPLOAD_CHUNK_SIZE = 32 * 1024 * 1024
+# the metadata server answers in a few ms when present, off-cloud we do not want to wait
+METADATA_PING_TIMEOUT = 0.05
+# once the metadata server is known to be there, it gets the same time google-auth gives it
+METADATA_TIMEOUT = 3
+# probed by ip, resolving metadata.google.internal off-cloud can take several seconds
+METADATA_IP = '169.254.169.254'
+METADATA_HEADERS = {'Metadata-Flavor': 'Google'}
+
 
 class GoogleStorage(RemoteStorage):
     """Google Cloud Storage helper class.
@@ -31,40 +62,149 @@ class GoogleStorage(RemoteStorage):
     :vartype credentials: google.auth.credentials.Credentials
     :ivar client: The Google Cloud Storage client.
     :vartype client: google.cloud.storage.client.Client
+    :ivar _buckets: Bucket handles by name, reused across calls.
+    :vartype _buckets: dict[str, google.cloud.storage.bucket.Bucket]
     """
 
+    # credentials are resolved once per process and shared by every instance
+    _credentials: Credentials | None = None
+    _project_id: str | None = None
+    _credentials_lock = Lock()
+    # a failed warm up is not retried, every instance would log the same warning again
+    _warm_auth_failed = False
+
     def __init__(self):
-        try:
-            credentials, project_id = auth.default(scopes=GOOGLE_SCOPES)
-            logger.debug(f'gcp authenticated on project {project_id}')
-        except auth_exceptions.DefaultCredentialsError as e:
-            logger.critical(f'error authenticating on gcp: {e}')
-            sys.exit(1)
+        credentials, project_id = self.get_credentials()
+
+        self.warm_auth()
 
         self.credentials = credentials
-        self.client = storage.Client(credentials=credentials)
+        self._session = AuthorizedSession(credentials)
+        self._session.mount('https://', HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE))
+        # passing the project explicitly keeps the client from resolving credentials again
+        self.client = storage.Client(project=project_id, credentials=credentials, _http=self._session)
+        self._buckets: dict[str, storage.Bucket] = {}
 
     @classmethod
+    def get_credentials(cls) -> tuple[Credentials, str | None]:
+        """Get the default Google Cloud credentials.
+
+        Credentials are only looked up the first time this is called, later calls
+        (and later instances of the class) reuse them, along with their cached token.
+        Anything else needing to talk to Google APIs should use this too.
+
+        :return: A tuple containing the credentials and the project id.
+        :rtype: tuple[Credentials, str | None]
+        """
+        with cls._credentials_lock:
+            if cls._credentials is None:
+                if gce_credentials := cls._get_gce_credentials():
+                    cls._credentials, cls._project_id = gce_credentials
+                    logger.debug(f'gcp authenticated on project {cls._project_id} using compute engine credentials')
+                    return cls._credentials, cls._project_id
+                try:
+                    cls._credentials, cls._project_id = auth.default(scopes=GOOGLE_SCOPES)
+                    logger.debug(f'gcp authenticated on project {cls._project_id}')
+                except auth_exceptions.DefaultCredentialsError as e:
+                    logger.critical(f'error authenticating on gcp: {e}')
+                    sys.exit(1)
+        return cls._credentials, cls._project_id
+
+    @classmethod
+    def warm_auth(cls) -> None:
+        """Make sure the shared credentials hold a valid access token.
+
+        Credentials start without a token, so otherwise the first request made by each
+        of the threads in a bulk operation would find it missing and try to refresh it
+        at the same time. Refreshing once here, under the credentials lock, means they
+        all start with a valid token. Failures are not fatal, the token will be
+        refreshed again on the first request. After a failure, later calls in the
+        same process do nothing.
+        """
+        if cls._warm_auth_failed:
+            return
+        credentials, _ = cls.get_credentials()
+        with cls._credentials_lock:
+            if credentials.valid or cls._warm_auth_failed:
+                return
+            try:
+                credentials.refresh(Request())
+                logger.trace('gcp access token refreshed')
+            except auth_exceptions.GoogleAuthError as e:
+                cls._warm_auth_failed = True
+                logger.warning(f'error refreshing gcp access token: {e}')
+
+    @staticmethod
+    def _get_gce_credentials() -> tuple[Credentials, str | None] | None:
+        # auth.default() probes every credential source with its own timeout before
+        # reaching the metadata server, so when running in gcp we go there directly.
+        # explicit credentials take precedence in auth.default(), so they do here too
+        if os.environ.get(environment_vars.CREDENTIALS):
+            return None
+        gcloud_config = os.environ.get('CLOUDSDK_CONFIG') or os.path.expanduser('~/.config/gcloud')
+        if os.path.isfile(os.path.join(gcloud_config, 'application_default_credentials.json')):
+            return None
+
+        # same overrides auth.default() honours, a metadata host set explicitly wins over the ip
+        metadata_host = (
+            os.environ.get(environment_vars.GCE_METADATA_HOST)
+            or os.environ.get(environment_vars.GCE_METADATA_ROOT)
+            or os.environ.get(environment_vars.GCE_METADATA_IP, METADATA_IP)
+        )
+        metadata_url = f'http://{metadata_host}/computeMetadata/v1/'
+        try:
+            r = requests.get(metadata_url, headers=METADATA_HEADERS, timeout=METADATA_PING_TIMEOUT)
+        except requests.RequestException:
+            return None
+        # anything else listening on that address would not answer with this header
+        if r.headers.get('Metadata-Flavor') != 'Google':
+            return None
+
+        project_id = os.environ.get(environment_vars.PROJECT) or os.environ.get(environment_vars.LEGACY_PROJECT)
+        if not project_id:
+            try:
+                r = requests.get(
+                    f'{metadata_url}project/project-id',
+                    headers=METADATA_HEADERS,
+                    timeout=METADATA_TIMEOUT,
+                )
+                project_id = r.text if r.ok else None
+            except requests.RequestException:
+                project_id = None
+        return compute_engine.Credentials(scopes=GOOGLE_SCOPES), project_id
+
+    @classmethod
+    @functools.lru_cache(maxsize=4096)
     def _parse_uri(cls, uri: str) -> tuple[str, str | None]:
-        uri_parts = uri.replace('gs://', '').split('/', 1)
+        # the same uris are parsed over and over, and the result only depends on the input
+        uri_parts = uri.removeprefix('gs://').split('/', 1)
         bucket_name = uri_parts[0]
 
-        bucket_re = r'^[a-z0-9][a-z0-9-_.]{2,221}[a-z0-9]$'
-        if re.match(bucket_re, bucket_name) is None:
+        if BUCKET_NAME_RE.match(bucket_name) is None:
             raise StorageError(f'invalid bucket name: {bucket_name}')
 
         file_path = uri_parts[1] if len(uri_parts) > 1 else None
         return bucket_name, file_path
 
     def _get_bucket(self, bucket_name: str) -> storage.Bucket:
+        # client.bucket() does not make any request, a missing bucket will surface
+        # as a NotFound error in the first operation that uses it
+        if bucket_name not in self._buckets:
+            self._buckets[bucket_name] = self.client.bucket(bucket_name)
+        return self._buckets[bucket_name]
+
+    def _probe_bucket(self, bucket_name: str) -> storage.Bucket:
+        # exists() only asks for the bucket name, full metadata is not needed here
+        bucket = self._get_bucket(bucket_name)
         try:
-            return self.client.get_bucket(bucket_name)
-        except NotFound:
-            raise NotFoundError(bucket_name)
+            exists = bucket.exists()
         except GoogleAPICallError as e:
             raise StorageError(f'google api error checking bucket {bucket_name}: {e}')
         except Exception as e:
             raise StorageError(f'error checking bucket {bucket_name}: {e}')
+        if not exists:
+            raise NotFoundError(bucket_name)
+        return bucket
 
     def _prepare_blob(self, bucket: storage.Bucket, prefix: str | None) -> storage.Blob:
         if prefix is None:
@@ -104,10 +244,13 @@ class GoogleStorage(RemoteStorage):
             'storage.objects.create',
             'storage.objects.delete',
             'storage.objects.update',
+            # files over UPLOAD_CHUNK_SIZE go through the xml multipart upload api
+            'storage.multipartUploads.create',
+            'storage.multipartUploads.abort',
         ]
 
         try:
-            bucket = self._get_bucket(bucket_name)
+            bucket = self._probe_bucket(bucket_name)
         except NotFoundError:
             logger.warning(f'bucket {bucket_name} not found')
             return False
@@ -143,6 +286,52 @@ class GoogleStorage(RemoteStorage):
             raise StorageError(f'error getting metadata for {uri}: {e}')
         return {'mtime': datetime.timestamp(blob.updated) if blob.updated else None}
 
+    def stat_many(self, uris: Sequence[str]) -> dict[str, dict]:
+        """Get metadata for several files in Google Cloud Storage.
+
+        Instead of fetching each blob, the URIs are grouped by bucket and parent
+        prefix, and each group is resolved with a single listing request.
+
+        :param uris: The URIs of the files to get metadata for.
+        :type uris: Sequence[str]
+        :return: A dictionary mapping each URI to its metadata.
+        :rtype: dict[str, dict]
+        :raises NotFoundError: If any of the files does not exist.
+        :raises StorageError: If an error occurs while listing the files.
+        """
+        groups: defaultdict[tuple[str, str], list[tuple[str, str]]] = defaultdict(list)
+        for uri in uris:
+            bucket_name, file_path = self._parse_uri(uri)
+            if file_path is None:
+                raise StorageError(f'invalid prefix: {file_path}')
+            parent, _, _ = file_path.rpartition('/')
+            groups[bucket_name, f'{parent}/' if parent else ''].append((uri, file_path))
+
+        stats: dict[str, dict] = {}
+        for (bucket_name, prefix), files in groups.items():
+            bucket = self._get_bucket(bucket_name)
+            try:
+                # the delimiter keeps the listing to the direct children of the prefix
+                updated = {
+                    blob.name: blob.updated
+                    for blob in bucket.list_blobs(
+                        prefix=prefix,
+                        delimiter='/',
+                        fields='items(name,updated),nextPageToken',
+                    )
+                }
+            except NotFound:
+                raise NotFoundError(f'gs://{bucket_name}/{prefix}')
+            except GoogleAPICallError as e:
+                raise StorageError(f'error getting metadata for gs://{bucket_name}/{prefix}: {e}')
+
+            for uri, file_path in files:
+                if file_path not in updated:
+                    raise NotFoundError(uri)
+                mtime = updated[file_path]
+                stats[uri] = {'mtime': datetime.timestamp(mtime) if mtime else None}
+        return stats
+
     def list(self, uri: str, pattern: str | None = None) -> list[str]:
         """List blobs in a bucket.
 
@@ -157,25 +346,41 @@ class GoogleStorage(RemoteStorage):
         """
         bucket_name, prefix = self._parse_uri(uri)
         bucket = self._get_bucket(bucket_name)
-        blob_names: list[str] = [n.name for n in list(bucket.list_blobs(prefix=prefix))]
-
-        # filter out blobs that have longer prefixes
-        blob_name_list = [n for n in blob_names if self._is_blob_shallow(n, prefix)]
-        # filter out blobs using include/exclude
-        if pattern is not None:
-            if pattern.startswith('!'):
-                blob_name_list = [blob_name for blob_name in blob_name_list if pattern[1:] not in blob_name]
-            else:
-                blob_name_list = [blob_name for blob_name in blob_name_list if pattern in blob_name]
 
-        if len(blob_name_list) == 0:
+        # build the include/exclude matcher once instead of branching on every blob
+        if pattern is None:
+            matches = lambda name: True
+        elif pattern.startswith('!'):
+            excluded = pattern[1:]
+            matches = lambda name: excluded not in name
+        else:
+            matches = lambda name: pattern in name
+
+        # single pass over the listing, skipping blobs that have longer prefixes
+        try:
+            blob_uris = [
+                f'gs://{bucket_name}/{blob.name}'
+                for blob in bucket.list_blobs(prefix=prefix)
+                if self._is_blob_shallow(blob.name, prefix) and matches(blob.name)
+            ]
+        except NotFound:
+            raise NotFoundError(uri)
+        except GoogleAPICallError as e:
+            raise StorageError(f'error listing {uri}: {e}')
+
+        if len(blob_uris) == 0:
             logger.warning(f'no files found in {uri}')
 
-        return [f'gs://{bucket_name}/{blob_name}' for blob_name in blob_name_list]
+        return blob_uris
 
     def download_to_file(self, uri: str, dst: Path) -> int:
         """Download a file from Google Cloud Storage to the local filesystem.
 
+        Files bigger than :data:`DOWNLOAD_CHUNK_SIZE` are downloaded as several byte
+        ranges in parallel, which makes much better use of the available bandwidth.
+        Deciding that takes an extra metadata request per download, whatever its size.
+        Files stored with a content encoding are always downloaded as a single stream.
+
         :param uri: The URI of the file to download.
         :type uri: str
         :param dst: The destination path to download the file to.
@@ -185,18 +390,60 @@ class GoogleStorage(RemoteStorage):
         :raises NotFoundError: If the file is not found.
         :raises StorageError: If an error occurs while downloading the file.
         """
+        return self._download_to_file(uri, dst, sliced=True)
+
+    def _download_to_file(self, uri: str, dst: Path, *, sliced: bool) -> int:
         bucket_name, prefix = self._parse_uri(uri)
         bucket = self._get_bucket(bucket_name)
         blob = self._prepare_blob(bucket, prefix)
 
         try:
-            blob.download_to_filename(dst)
+            if sliced:
+                # we need the size to decide, and the generation so all slices match
+                blob.reload()
+            # gcs decompresses gzip encoded files on the fly, byte ranges would not match
+            if sliced and not blob.content_encoding and blob.size is not None and blob.size > DOWNLOAD_CHUNK_SIZE:
+                logger.debug(f'downloading {uri} in slices of {DOWNLOAD_CHUNK_SIZE} bytes')
+                transfer_manager.download_chunks_concurrently(
+                    blob,
+                    str(dst),
+                    chunk_size=DOWNLOAD_CHUNK_SIZE,
+                    worker_type=transfer_manager.THREAD,
+                    max_workers=MAX_WORKERS,
+                )
+            else:
+                blob.download_to_filename(dst)
         except NotFound:
+            Path(dst).unlink(missing_ok=True)
             raise NotFoundError(uri)
-        except (GoogleAPICallError, OSError) as e:
+        except (GoogleAPICallError, DataCorruption, OSError) as e:
+            # a failed sliced download leaves a partially written file behind
+            Path(dst).unlink(missing_ok=True)
             raise StorageError(f'error downloading {uri}: {e}')
         return blob.generation or 0
 
+    def download_many(self, uris: Sequence[str], dsts: Sequence[Path]) -> dict[str, int]:
+        """Download several files from Google Cloud Storage concurrently.
+
+        Each file is downloaded as a single stream, large files are not sliced.
+
+        :param uris: The URIs of the files to download.
+        :type uris: Sequence[str]
+        :param dsts: The destination paths, in the same order as the URIs.
+        :type dsts: Sequence[Path]
+        :return: A dictionary mapping each URI to the generation number of the file.
+        :rtype: dict[str, int]
+        :raises NotFoundError: If any of the files is not found.
+        :raises StorageError: If an error occurs while downloading any of the files.
+        """
+        # the files are already downloaded in parallel, slicing them too would multiply
+        # the threads and go over the connection pool
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = {
+                pool.submit(self._download_to_file, u, d, sliced=False): u for u, d in zip(uris, dsts, strict=True)
+            }
+            return {futures[f]: f.result() for f in as_completed(futures)}
+
     def download_to_string(self, uri: str) -> tuple[str, int]:
         """Download a file from Google Cloud Storage and return its contents as a string.
 
@@ -227,6 +474,9 @@ class GoogleStorage(RemoteStorage):
     def upload(self, src: Path, uri: str, revision: int | None = None) -> int:
         """Upload a file to Google Cloud Storage.
 
+        Files bigger than :data:`UPLOAD_CHUNK_SIZE` are uploaded as several parts in
+        parallel and composed by the server, unless a revision is given.
+
         :param src: The source path of the file to upload.
         :type src: Path
         :param uri: The URI to upload the file to.
@@ -244,12 +494,23 @@ class GoogleStorage(RemoteStorage):
 
         try:
             if revision is not None:
+                # multipart uploads do not support generation preconditions
                 blob.upload_from_filename(src, if_generation_match=revision)
+            elif os.path.getsize(src) > UPLOAD_CHUNK_SIZE:
+                logger.debug(f'uploading {src} in parts of {UPLOAD_CHUNK_SIZE} bytes')
+                transfer_manager.upload_chunks_concurrently(
+                    str(src),
+                    blob,
+                    chunk_size=UPLOAD_CHUNK_SIZE,
+                    worker_type=transfer_manager.THREAD,
+                    max_workers=MAX_WORKERS,
+                )
             else:
                 blob.upload_from_filename(src)
         except PreconditionFailed:
             raise PreconditionFailedError(f'upload of {src} failed due to generation mismatch')
-        except (GoogleAPICallError, OSError) as e:
+        # the multipart upload raises resumable media errors as they come, unlike upload_from_filename
+        except (GoogleAPICallError, InvalidResponse, DataCorruption, OSError) as e:
             raise StorageError(f'error uploading {src}: {e}')
         blob.reload()
         return blob.generation or 0
@@ -257,7 +518,10 @@ class GoogleStorage(RemoteStorage):
     def get_session(self) -> AuthorizedSession:
         """Get the current authenticated session.
 
+        This is the same session the storage client uses, so its connections and its
+        access token are shared with it.
+
         :return: An authorized session.
         :rtype: AuthorizedSession
         """
-        return AuthorizedSession(self.credentials)
+        return self._session
@@ -3,12 +3,22 @@ from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
+import requests
 from google.api_core.exceptions import GoogleAPICallError, PreconditionFailed
+from google.auth import compute_engine
+from google.auth.exceptions import DefaultCredentialsError, RefreshError
 from google.cloud import storage
 from google.cloud.exceptions import NotFound
+from google.resumable_media import DataCorruption, InvalidResponse
 from loguru import logger
 
-from pis.storage.google import GoogleStorage
+from pis.storage.google import (
+    DOWNLOAD_CHUNK_SIZE,
+    METADATA_PING_TIMEOUT,
+    METADATA_TIMEOUT,
+    UPLOAD_CHUNK_SIZE,
+    GoogleStorage,
+)
 from pis.util.errors import NotFoundError, PreconditionFailedError, StorageError
 
 urls: list[tuple[str, tuple[str, str | None]]] = [
@@ -53,6 +63,151 @@ def mock_parse_url():
         yield mock_parse_url
 
 
+@pytest.fixture
+def reset_credentials():
+    GoogleStorage._credentials, GoogleStorage._project_id = None, None
+    GoogleStorage._warm_auth_failed = False
+    yield
+    GoogleStorage._credentials, GoogleStorage._project_id = None, None
+    GoogleStorage._warm_auth_failed = False
+
+
+@pytest.fixture
+def no_gce():
+    with patch.object(GoogleStorage, '_get_gce_credentials', return_value=None) as mock_gce:
+        yield mock_gce
+
+
+def test_get_credentials_shared(reset_credentials, no_gce):
+    credentials = MagicMock()
+
+    with patch('pis.storage.google.auth.default', return_value=(credentials, 'project')) as mock_default:
+        assert GoogleStorage.get_credentials() == (credentials, 'project')
+        assert GoogleStorage.get_credentials() == (credentials, 'project')
+
+    mock_default.assert_called_once()
+
+
+def test_get_credentials_gce(reset_credentials):
+    credentials = MagicMock()
+
+    with (
+        patch.object(GoogleStorage, '_get_gce_credentials', return_value=(credentials, 'project')),
+        patch('pis.storage.google.auth.default') as mock_default,
+    ):
+        assert GoogleStorage.get_credentials() == (credentials, 'project')
+
+    mock_default.assert_not_called()
+
+
+def test_warm_auth_refreshes(reset_credentials):
+    credentials = MagicMock(valid=False)
+
+    with patch.object(GoogleStorage, 'get_credentials', return_value=(credentials, 'project')):
+        GoogleStorage.warm_auth()
+
+    credentials.refresh.assert_called_once()
+
+
+def test_warm_auth_valid_token(reset_credentials):
+    credentials = MagicMock(valid=True)
+
+    with patch.object(GoogleStorage, 'get_credentials', return_value=(credentials, 'project')):
+        GoogleStorage.warm_auth()
+
+    credentials.refresh.assert_not_called()
+
+
+def test_warm_auth_ko(reset_credentials, caplog):
+    credentials = MagicMock(valid=False)
+    credentials.refresh.side_effect = RefreshError('test')
+    logger.add(caplog.handler, level='TRACE', format='{message}')
+
+    with patch.object(GoogleStorage, 'get_credentials', return_value=(credentials, 'project')):
+        GoogleStorage.warm_auth()
+        GoogleStorage.warm_auth()
+
+    credentials.refresh.assert_called_once()
+    assert caplog.text.count('error refreshing gcp access token') == 1
+
+
+def _metadata_response(text: str = '', flavor: str | None = 'Google') -> MagicMock:
+    response = MagicMock(ok=True, text=text)
+    response.headers = {'Metadata-Flavor': flavor} if flavor else {}
+    return response
+
+
+@pytest.fixture
+def no_adc(monkeypatch, tmp_path):
+    monkeypatch.delenv('GOOGLE_APPLICATION_CREDENTIALS', raising=False)
+    monkeypatch.delenv('GOOGLE_CLOUD_PROJECT', raising=False)
+    monkeypatch.delenv('GCLOUD_PROJECT', raising=False)
+    for var in ('GCE_METADATA_HOST', 'GCE_METADATA_ROOT', 'GCE_METADATA_IP'):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv('CLOUDSDK_CONFIG', str(tmp_path))
+    return tmp_path
+
+
+def test_get_gce_credentials_explicit_credentials(monkeypatch):
+    monkeypatch.setenv('GOOGLE_APPLICATION_CREDENTIALS', '/path/to/key.json')
+
+    with patch('pis.storage.google.requests.get') as mock_get:
+        assert GoogleStorage._get_gce_credentials() is None
+
+    mock_get.assert_not_called()
+
+
+def test_get_gce_credentials_gcloud_adc(no_adc):
+    (no_adc / 'application_default_credentials.json').write_text('{}')
+
+    with patch('pis.storage.google.requests.get') as mock_get:
+        assert GoogleStorage._get_gce_credentials() is None
+
+    mock_get.assert_not_called()
+
+
+def test_get_gce_credentials_off_cloud(no_adc):
+    with patch('pis.storage.google.requests.get', side_effect=requests.ConnectionError('test')):
+        assert GoogleStorage._get_gce_credentials() is None
+
+
+def test_get_gce_credentials_not_metadata_server(no_adc):
+    with patch('pis.storage.google.requests.get', return_value=_metadata_response(flavor=None)):
+        assert GoogleStorage._get_gce_credentials() is None
+
+
+def test_get_gce_credentials_on_cloud(no_adc):
+    with patch('pis.storage.google.requests.get', return_value=_metadata_response('project')) as mock_get:
+        credentials, project_id = GoogleStorage._get_gce_credentials()
+
+    assert isinstance(credentials, compute_engine.Credentials)
+    assert project_id == 'project'
+    assert all(c.kwargs['headers'] == {'Metadata-Flavor': 'Google'} for c in mock_get.call_args_list)
+    ping, project = mock_get.call_args_list
+    assert ping.args == ('http://169.254.169.254/computeMetadata/v1/',)
+    assert ping.kwargs['timeout'] == METADATA_PING_TIMEOUT
+    assert project.args == ('http://169.254.169.254/computeMetadata/v1/project/project-id',)
+    assert project.kwargs['timeout'] == METADATA_TIMEOUT
+
+
+def test_get_gce_credentials_metadata_host(no_adc, monkeypatch):
+    monkeypatch.setenv('GCE_METADATA_HOST', 'metadata.local:8080')
+    monkeypatch.setenv('GOOGLE_CLOUD_PROJECT', 'project')
+
+    with patch('pis.storage.google.requests.get', return_value=_metadata_response()) as mock_get:
+        _, project_id = GoogleStorage._get_gce_credentials()
+
+    assert project_id == 'project'
+    mock_get.assert_called_once()
+    assert mock_get.call_args.args == ('http://metadata.local:8080/computeMetadata/v1/',)
+
+
+def test_get_credentials_ko(reset_credentials, no_gce):
+    with patch('pis.storage.google.auth.default', side_effect=DefaultCredentialsError('test')):
+        with pytest.raises(SystemExit):
+            GoogleStorage.get_credentials()
+
+
 @pytest.mark.parametrize(
     ('input', 'expected'),
     [
@@ -86,33 +241,61 @@ def test_parse_uri_ko(input):
 def test_get_bucket_ok(mock_parse_url):
     g = GoogleStorage()
     g.client = MagicMock(storage.Client)
+    g._buckets = {}
 
-    g._get_bucket('bucket')
+    b = g._get_bucket('bucket')
 
-    g.client.get_bucket.assert_called_once_with('bucket')
+    g.client.bucket.assert_called_once_with('bucket')
+    g.client.get_bucket.assert_not_called()
+    assert b == g.client.bucket.return_value
 
 
-def test_get_bucket_ko(mock_parse_url):
+def test_get_bucket_cached(mock_parse_url):
     g = GoogleStorage()
     g.client = MagicMock(storage.Client)
-    g.client.get_bucket.side_effect = GoogleAPICallError('test')
+    g._buckets = {}
+
+    assert g._get_bucket('bucket') is g._get_bucket('bucket')
+    g.client.bucket.assert_called_once_with('bucket')
+
+
+def test_probe_bucket_ok(mock_parse_url):
+    g = GoogleStorage()
+    g.client = MagicMock(storage.Client)
+    g._buckets = {}
+    g.client.bucket.return_value.exists.return_value = True
+
+    b = g._probe_bucket('bucket')
+
+    assert b == g.client.bucket.return_value
+    b.exists.assert_called_once()
+    g.client.get_bucket.assert_not_called()
+    assert g._get_bucket('bucket') is b
+
+
+def test_probe_bucket_ko(mock_parse_url):
+    g = GoogleStorage()
+    g.client = MagicMock(storage.Client)
+    g._buckets = {}
+    g.client.bucket.return_value.exists.side_effect = GoogleAPICallError('test')
 
     with pytest.raises(StorageError):
-        g._get_bucket('gs://bucket')
+        g._probe_bucket('bucket')
 
-    g.client.get_bucket.side_effect = Exception('test')
+    g.client.bucket.return_value.exists.side_effect = Exception('test')
 
     with pytest.raises(StorageError):
-        g._get_bucket('gs://bucket')
+        g._probe_bucket('bucket')
 
 
-def test_get_bucket_non_existing(mock_parse_url):
+def test_probe_bucket_non_existing(mock_parse_url):
     g = GoogleStorage()
     g.client = MagicMock(storage.Client)
-    g.client.get_bucket.side_effect = NotFound('test')
+    g._buckets = {}
+    g.client.bucket.return_value.exists.return_value = False
 
     with pytest.raises(NotFoundError):
-        g._get_bucket('gs://bucket')
+        g._probe_bucket('bucket')
 
 
 def test_prepare_blob_ok(mock_parse_url):
@@ -185,9 +368,9 @@ def test_is_blob_shallow(blob_name, prefix, result):
 
 def test_check_ok(mock_parse_url):
     g = GoogleStorage()
-    g._get_bucket = MagicMock()
+    g._probe_bucket = MagicMock()
     g._prepare_blob = MagicMock()
-    g._get_bucket.return_value.test_iam_permissions = MagicMock(
+    g._probe_bucket.return_value.test_iam_permissions = MagicMock(
         return_value=[
             'storage.buckets.get',
             'storage.objects.list',
@@ -195,6 +378,8 @@ def test_check_ok(mock_parse_url):
             'storage.objects.create',
             'storage.objects.delete',
             'storage.objects.update',
+            'storage.multipartUploads.create',
+            'storage.multipartUploads.abort',
         ]
     )
 
@@ -203,18 +388,18 @@ def test_check_ok(mock_parse_url):
 
 def test_check_ko(mock_parse_url):
     g = GoogleStorage()
-    g._get_bucket = MagicMock()
+    g._probe_bucket = MagicMock()
     g._prepare_blob = MagicMock()
-    g._get_bucket.return_value.test_iam_permissions = MagicMock(return_value=[])
+    g._probe_bucket.return_value.test_iam_permissions = MagicMock(return_value=[])
 
     assert not g.check('gs://bucket')
 
 
 def test_check_non_existing(mock_parse_url):
     g = GoogleStorage()
-    g._get_bucket = MagicMock()
+    g._probe_bucket = MagicMock()
     g._prepare_blob = MagicMock()
-    g._get_bucket.side_effect = NotFoundError('test')
+    g._probe_bucket.side_effect = NotFoundError('test')
 
     assert not g.check('gs://bucket')
 
@@ -249,6 +434,64 @@ def test_stat_non_existing(mock_parse_url):
         g.stat('gs://bucket/file.txt')
 
 
+def _listed_blob(name: str, updated: datetime | None) -> MagicMock:
+    blob = MagicMock(storage.Blob)
+    blob.name = name
+    blob.updated = updated
+    return blob
+
+
+def test_stat_many_ok():
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._get_bucket.return_value.list_blobs.return_value = [
+        _listed_blob('dir/a.txt', datetime(2021, 1, 1)),
+        _listed_blob('dir/b.txt', datetime(2022, 1, 1)),
+        _listed_blob('dir/c.txt', None),
+    ]
+    uris = ['gs://bucket/dir/a.txt', 'gs://bucket/dir/b.txt', 'gs://bucket/dir/c.txt']
+
+    assert g.stat_many(uris) == {
+        'gs://bucket/dir/a.txt': {'mtime': datetime(2021, 1, 1).timestamp()},
+        'gs://bucket/dir/b.txt': {'mtime': datetime(2022, 1, 1).timestamp()},
+        'gs://bucket/dir/c.txt': {'mtime': None},
+    }
+    g._get_bucket.return_value.list_blobs.assert_called_once()
+    assert g._get_bucket.return_value.list_blobs.call_args.kwargs['prefix'] == 'dir/'
+
+
+def test_stat_many_groups_by_prefix():
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._get_bucket.return_value.list_blobs.side_effect = [
+        [_listed_blob('a.txt', datetime(2021, 1, 1))],
+        [_listed_blob('dir/b.txt', datetime(2022, 1, 1))],
+    ]
+
+    stats = g.stat_many(['gs://bucket/a.txt', 'gs://bucket/dir/b.txt'])
+
+    assert len(stats) == 2
+    assert g._get_bucket.return_value.list_blobs.call_count == 2
+
+
+def test_stat_many_non_existing():
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._get_bucket.return_value.list_blobs.return_value = [_listed_blob('dir/a.txt', datetime(2021, 1, 1))]
+
+    with pytest.raises(NotFoundError):
+        g.stat_many(['gs://bucket/dir/a.txt', 'gs://bucket/dir/b.txt'])
+
+
+def test_stat_many_ko():
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._get_bucket.return_value.list_blobs.side_effect = GoogleAPICallError('test')
+
+    with pytest.raises(StorageError):
+        g.stat_many(['gs://bucket/dir/a.txt'])
+
+
 def test_list_blobs_ok(mock_parse_url):
     g = GoogleStorage()
     g._get_bucket = MagicMock()
@@ -291,21 +534,83 @@ def test_list_ok_negative_pattern(mock_parse_url):
     assert len(blob_names) == 3
 
 
+def test_list_non_existing(mock_parse_url):
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._get_bucket.return_value.list_blobs.side_effect = NotFound('test')
+
+    with pytest.raises(NotFoundError):
+        g.list('testpath')
+
+
 def test_download_to_file_ok(mock_parse_url, tmp_path):
     g = GoogleStorage()
     g._get_bucket = MagicMock()
     g._prepare_blob = MagicMock()
     destination = tmp_path / 'file.txt'
+    g._prepare_blob.return_value.size = 1024
     g._prepare_blob.return_value.generation = 123123123
 
     assert g.download_to_file('gs://bucket/file.txt', destination) == 123123123
     g._prepare_blob.return_value.download_to_filename.assert_called_once_with(destination)
 
 
+def test_download_to_file_sliced(mock_parse_url, tmp_path):
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._prepare_blob = MagicMock()
+    destination = tmp_path / 'file.txt'
+    g._prepare_blob.return_value.size = DOWNLOAD_CHUNK_SIZE * 3
+    g._prepare_blob.return_value.content_encoding = None
+    g._prepare_blob.return_value.generation = 123123123
+
+    with patch('pis.storage.google.transfer_manager.download_chunks_concurrently') as mock_download:
+        assert g.download_to_file('gs://bucket/file.txt', destination) == 123123123
+
+    mock_download.assert_called_once()
+    assert mock_download.call_args.args == (g._prepare_blob.return_value, str(destination))
+    g._prepare_blob.return_value.download_to_filename.assert_not_called()
+
+
+def test_download_to_file_content_encoding(mock_parse_url, tmp_path):
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._prepare_blob = MagicMock()
+    destination = tmp_path / 'file.txt.gz'
+    g._prepare_blob.return_value.size = DOWNLOAD_CHUNK_SIZE * 3
+    g._prepare_blob.return_value.content_encoding = 'gzip'
+
+    with patch('pis.storage.google.transfer_manager.download_chunks_concurrently') as mock_download:
+        g.download_to_file('gs://bucket/file.txt.gz', destination)
+
+    mock_download.assert_not_called()
+    g._prepare_blob.return_value.download_to_filename.assert_called_once_with(destination)
+
+
+def test_download_to_file_sliced_ko(mock_parse_url, tmp_path):
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._prepare_blob = MagicMock()
+    destination = tmp_path / 'file.txt'
+    g._prepare_blob.return_value.size = DOWNLOAD_CHUNK_SIZE * 3
+    g._prepare_blob.return_value.content_encoding = None
+
+    def partial_download(*args, **kwargs):
+        destination.write_bytes(b'partial')
+        raise DataCorruption(None, 'checksum mismatch')
+
+    with patch('pis.storage.google.transfer_manager.download_chunks_concurrently', side_effect=partial_download):
+        with pytest.raises(StorageError):
+            g.download_to_file('gs://bucket/file.txt', destination)
+
+    assert not destination.exists()
+
+
 def test_download_to_file_not_found(mock_parse_url, tmp_path):
     g = GoogleStorage()
     g._get_bucket = MagicMock()
     g._prepare_blob = MagicMock()
+    g._prepare_blob.return_value.size = 1024
     g._prepare_blob.return_value.download_to_filename.side_effect = NotFound('test')
     destination = tmp_path / 'file.txt'
 
@@ -317,6 +622,7 @@ def test_download_to_file_ko(mock_parse_url, tmp_path):
     g = GoogleStorage()
     g._get_bucket = MagicMock()
     g._prepare_blob = MagicMock()
+    g._prepare_blob.return_value.size = 1024
     g._prepare_blob.return_value.download_to_filename.side_effect = [GoogleAPICallError('test'), OSError('test')]
     destination = tmp_path / 'file.txt'
 
@@ -324,6 +630,32 @@ def test_download_to_file_ko(mock_parse_url, tmp_path):
         g.download_to_file('gs://bucket/file.txt', destination)
 
 
+def test_download_many_ok(mock_parse_url, tmp_path):
+    g = GoogleStorage()
+    g._download_to_file = MagicMock(return_value=123)
+    uris = ['gs://bucket/a.txt', 'gs://bucket/b.txt']
+    dsts = [tmp_path / 'a.txt', tmp_path / 'b.txt']
+
+    assert g.download_many(uris, dsts) == dict.fromkeys(uris, 123)
+    for uri, dst in zip(uris, dsts, strict=True):
+        g._download_to_file.assert_any_call(uri, dst, sliced=False)
+
+
+def test_download_many_not_sliced(mock_parse_url, tmp_path):
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._prepare_blob = MagicMock()
+    g._prepare_blob.return_value.size = DOWNLOAD_CHUNK_SIZE * 3
+    g._prepare_blob.return_value.content_encoding = None
+    g._prepare_blob.return_value.generation = 123
+
+    with patch('pis.storage.google.transfer_manager.download_chunks_concurrently') as mock_download:
+        g.download_many(['gs://bucket/file.txt'], [tmp_path / 'file.txt'])
+
+    mock_download.assert_not_called()
+    g._prepare_blob.return_value.download_to_filename.assert_called_once_with(tmp_path / 'file.txt')
+
+
 def test_download_to_string_ok(mock_parse_url):
     g = GoogleStorage()
     g._get_bucket = MagicMock()
@@ -356,17 +688,54 @@ def test_download_to_string_decode_error(mock_parse_url):
         g.download_to_string('gs://bucket/file.txt')
 
 
-def test_upload_ok(mock_parse_url):
+def test_upload_ok(mock_parse_url, tmp_path):
     g = GoogleStorage()
     g._get_bucket = MagicMock()
     g._prepare_blob = MagicMock()
-    src = Path('file.txt')
+    src = tmp_path / 'file.txt'
+    src.write_text('test')
 
     g.upload(src, 'gs://bucket/file.txt')
 
     g._prepare_blob.return_value.upload_from_filename.assert_called_once_with(src)
 
 
+def test_upload_ok_parallel(mock_parse_url, tmp_path):
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._prepare_blob = MagicMock()
+    src = tmp_path / 'file.txt'
+    with open(src, 'wb') as f:
+        f.truncate(UPLOAD_CHUNK_SIZE * 2)
+
+    with patch('pis.storage.google.transfer_manager.upload_chunks_concurrently') as mock_upload:
+        g.upload(src, 'gs://bucket/file.txt')
+
+    mock_upload.assert_called_once()
+    assert mock_upload.call_args.args == (str(src), g._prepare_blob.return_value)
+    g._prepare_blob.return_value.upload_from_filename.assert_not_called()
+
+
+def test_upload_parallel_ko(mock_parse_url, tmp_path):
+    g = GoogleStorage()
+    g._get_bucket = MagicMock()
+    g._prepare_blob = MagicMock()
+    src = tmp_path / 'file.txt'
+    with open(src, 'wb') as f:
+        f.truncate(UPLOAD_CHUNK_SIZE * 2)
+
+    with patch('pis.storage.google.transfer_manager.upload_chunks_concurrently') as mock_upload:
+        mock_upload.side_effect = [
+            InvalidResponse(MagicMock(), 'test'),
+            DataCorruption(MagicMock(), 'test'),
+            TimeoutError('test'),
+        ]
+
+        for _ in range(3):
+            with pytest.raises(StorageError):
+                g.upload(src, 'gs://bucket/file.txt')
+
+
 def test_upload_ok_revision(mock_parse_url):
     g = GoogleStorage()
     g._get_bucket = MagicMock()
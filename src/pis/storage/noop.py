@@ -1,5 +1,6 @@
 """No-op storage class."""
 
+from collections.abc import Sequence
 from pathlib import Path
 
 from pis.storage.remote_storage import RemoteStorage
@@ -21,6 +22,10 @@ class NoopStorage(RemoteStorage):
         """Get metadata for a file."""
         raise NotFoundError(uri)
 
+    def stat_many(self, uris: Sequence[str]) -> dict[str, dict]:
+        """Get metadata for several files."""
+        raise NotFoundError(', '.join(uris))
+
     def list(self, uri: str, pattern: str | None = None) -> list[str]:
         """List files."""
         raise NotFoundError(uri)
@@ -29,6 +34,10 @@ class NoopStorage(RemoteStorage):
         """Download a file to the local filesystem."""
         raise NotFoundError(uri)
 
+    def download_many(self, uris: Sequence[str], dsts: Sequence[Path]) -> dict[str, int]:
+        """Download several files to the local filesystem."""
+        raise NotFoundError(', '.join(uris))
+
     def download_to_string(self, uri: str) -> tuple[str, int]:
         """Download a file and return its contents as a string."""
         raise NotFoundError(uri)
@@ -2,6 +2,7 @@
 
 import sys
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from pathlib import Path
 from typing import Any
 
@@ -39,6 +40,20 @@ class RemoteStorage(ABC):
         :raises NotFoundError: If the file does not exist.
         """
 
+    @abstractmethod
+    def stat_many(self, uris: Sequence[str]) -> dict[str, dict]:
+        """Get metadata for several files.
+
+        Implementations should take advantage of the storage service to make this
+        faster than calling :meth:`stat` for every file.
+
+        :param uris: The URIs to get metadata for.
+        :type uris: Sequence[str]
+        :return: A dictionary mapping each URI to its metadata.
+        :rtype: dict[str, dict]
+        :raises NotFoundError: If any of the files does not exist.
+        """
+
     @abstractmethod
     def list(self, uri: str, pattern: str | None = None) -> list[str]:
         """List files in prefix URI.
@@ -71,6 +86,20 @@ class RemoteStorage(ABC):
         :raises HelperError: If an error occurs during download.
         """
 
+    @abstractmethod
+    def download_many(self, uris: Sequence[str], dsts: Sequence[Path]) -> dict[str, int]:
+        """Download several files to the local filesystem.
+
+        :param uris: The URIs of the files to download.
+        :type uris: Sequence[str]
+        :param dsts: The destination paths, in the same order as the URIs.
+        :type dsts: Sequence[Path]
+        :return: A dictionary mapping each URI to the revision number of the file.
+        :rtype: dict[str, int]
+        :raises NotFoundError: If any of the files does not exist.
+        :raises HelperError: If an error occurs during download.
+        """
+
     @abstractmethod
     def download_to_string(self, uri: str) -> tuple[str, int]:
         """Download a file and return its contents as a string.
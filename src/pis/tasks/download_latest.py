@@ -44,16 +44,11 @@ class DownloadLatest(Task):
         if not files:
             raise ValueError(f'no files found in {self.definition.source} with pattern {self.definition.pattern}')
 
-        newest_file = files.pop(0)
+        newest_file = files[0]
 
-        if len(files):
-            mtime = remote_storage.stat(newest_file)['mtime']
-
-            for file in files:
-                new_mtime = remote_storage.stat(file).get('mtime', 0)
-                if remote_storage.stat(file).get('mtime', 0) > mtime:
-                    newest_file = file
-                    mtime = new_mtime
+        if len(files) > 1:
+            mtimes = remote_storage.stat_many(files)
+            newest_file = max(files, key=lambda f: mtimes[f].get('mtime') or 0)
 
         logger.info(f'latest file is {newest_file}')
         download(newest_file, destination)
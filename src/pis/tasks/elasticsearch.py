@@ -5,7 +5,7 @@ import sys
 from dataclasses import dataclass
 from pathlib import Path
 from threading import Event
-from typing import Any, Self
+from typing import Any, Self, TextIO
 
 import elasticsearch
 import elasticsearch.helpers
@@ -64,23 +64,38 @@ class Elasticsearch(Task):
             self.es.close()
             del self.es
 
-    def _write_docs(self, docs: list[dict[str, Any]], destination: Path):
-        """Write documents to the destination file."""
-        try:
-            with open(destination, 'a+') as f:
-                for d in docs:
-                    json.dump(d, f)
-                    f.write('\n')
-            self.doc_written += len(docs)
-
-        except OSError as e:
-            self._close_es()
-            raise ElasticsearchError(f'error writing to {destination}: {e}')
+    def _write_docs(self, docs: list[dict[str, Any]], f: TextIO):
+        """Write documents to the open destination file."""
+        f.writelines(f'{json.dumps(d)}\n' for d in docs)
+        self.doc_written += len(docs)
 
-        logger.debug(f'wrote {len(docs)} ({self.doc_written}/{self.doc_count}) documents to {destination}')
+        logger.debug(f'wrote {len(docs)} ({self.doc_written}/{self.doc_count}) documents to {f.name}')
         logger.debug(f'the dict was taking up {sys.getsizeof(docs)} bytes of memory')
         docs.clear()
 
+    def _scan_to_file(self, index: str, fields: list[str], f: TextIO, *, abort: Event):
+        """Scan the index and write the selected fields of each document to the file."""
+        buffer: list[dict[str, Any]] = []
+        try:
+            for hit in elasticsearch.helpers.scan(
+                client=self.es,
+                index=index,
+                query={'query': {'match_all': {}}, '_source': fields},
+            ):
+                buffer.append(hit['_source'])
+                if len(buffer) >= BUFFER_SIZE:
+                    logger.trace('flushing buffer')
+                    self._write_docs(buffer, f)
+
+                    # we can use this moment to check for abort signals and bail out
+                    if abort and abort.is_set():
+                        raise TaskAbortedError
+        except ScanError as e:
+            logger.warning(f'error scanning index {index}: {e}')
+            raise ElasticsearchError(f'error scanning index {index}: {e}')
+
+        self._write_docs(buffer, f)
+
     @report
     def run(self, *, abort: Event) -> Self:
         url = self.definition.url
@@ -104,27 +119,14 @@ class Elasticsearch(Task):
             raise ElasticsearchError(f'error getting index count on index {index}: {e}')
         logger.info(f'index {index} has {self.doc_count} documents')
 
-        buffer: list[dict[str, Any]] = []
         try:
-            for hit in elasticsearch.helpers.scan(
-                client=self.es,
-                index=index,
-                query={'query': {'match_all': {}}, '_source': fields},
-            ):
-                buffer.append(hit['_source'])
-                if len(buffer) >= BUFFER_SIZE:
-                    logger.trace('flushing buffer')
-                    self._write_docs(buffer, destination)
-                    buffer.clear()
-
-                    # we can use this moment to check for abort signals and bail out
-                    if abort and abort.is_set():
-                        raise TaskAbortedError
-        except ScanError as e:
-            logger.warning(f'error scanning index {index}: {e}')
-            raise ElasticsearchError(f'error scanning index {index}: {e}')
+            # keep the file open for the whole scan instead of reopening it on every flush
+            with open(destination, 'w') as f:
+                self._scan_to_file(index, fields, f, abort=abort)
+        except OSError as e:
+            self._close_es()
+            raise ElasticsearchError(f'error writing to {destination}: {e}')
 
-        self._write_docs(buffer, destination)
         logger.debug(f'wrote {self.doc_written}/{self.doc_count} documents to {destination}')
         self.resource = Resource(source=f'{url}/{index}', destination=str(self.definition.destination))
         self._close_es()
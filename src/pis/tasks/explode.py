@@ -1,6 +1,5 @@
 """Pretask — explode tasks based on a list of dictionaries."""
 
-import json
 import sys
 from collections.abc import Callable
 from dataclasses import dataclass
@@ -123,9 +122,8 @@ def urls_from_json(
     :rtype: list[dict[str, str]]
     """
     destination_file = download(source, destination)
-    file_content = destination_file.read_text()
-    json_data = json.loads(file_content)
-    srcs = jq.compile(json_path).input_value(json_data).all()
+    # jq parses the text itself, loading it with json first would parse it twice
+    srcs = jq.compile(json_path).input_text(destination_file.read_text()).all()
 
     if prefix:
         dsts = [source.replace(prefix, '') for source in srcs]
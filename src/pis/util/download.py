@@ -1,6 +1,7 @@
 """Helper that downloads files from various sources."""
 
 import functools
+import os
 import shutil
 from pathlib import Path
 from threading import Event
@@ -17,6 +18,49 @@ from pis.util.fs import absolute_path, check_fs
 # we are going to download big files, better to use a big chunk size
 CHUNK_SIZE = 1024 * 1024 * 10
 REQUEST_TIMEOUT = 10
+# tasks in the same worker process hit many different hosts, keep a pool for each
+HTTP_POOL_SIZE = 32
+
+_session: requests.Session | None = None
+
+
+def _create_session_with_retries() -> requests.Session:
+    session = requests.Session()
+    retries = Retry(
+        total=5,
+        backoff_factor=0.1,  # type: ignore[arg-type]
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods={'GET'},
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _reset_session():
+    global _session  # noqa: PLW0603
+    _session = None
+
+
+# a forked worker must not share the open connections of its parent
+os.register_at_fork(after_in_child=_reset_session)
+
+
+def http_session() -> requests.Session:
+    """Get the HTTP session of the current process.
+
+    The session is created on first use and then reused, so connections to a host
+    are kept alive between downloads instead of paying a new TCP and TLS handshake
+    for every file.
+
+    :return: The HTTP session.
+    :rtype: requests.Session
+    """
+    global _session  # noqa: PLW0603
+    if _session is None:
+        _session = _create_session_with_retries()
+    return _session
 
 
 class AbortableStreamWrapper:
@@ -91,22 +135,9 @@ class HttpDownloader(Downloader):
     def download(self, src: str, dst: Path, *, abort: Event | None = None) -> Path:
         """Download a file from an HTTP or HTTPS URL."""
         logger.debug('starting http(s) download')
-        session = self._create_session_with_retries()
-        self._download(src, dst, session, abort=abort)
+        self._download(src, dst, http_session(), abort=abort)
         return dst
 
-    def _create_session_with_retries(self) -> requests.Session:
-        session = requests.Session()
-        retries = Retry(
-            total=5,
-            backoff_factor=0.1,  # type: ignore[arg-type]
-            status_forcelist=[500, 502, 503, 504],
-            allowed_methods={'GET'},
-        )
-        session.mount('http://', HTTPAdapter(max_retries=retries))
-        session.mount('https://', HTTPAdapter(max_retries=retries))
-        return session
-
 
 class GoogleSheetsDownloader(Downloader):
     """Downloader for Google Sheets URLs."""
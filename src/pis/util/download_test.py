@@ -11,10 +11,19 @@ from pis.util.download import (
     HelperError,
     HttpDownloader,
     TaskAbortedError,
+    _reset_session,
     download,
+    http_session,
 )
 
 
+@pytest.fixture(autouse=True)
+def reset_session():
+    _reset_session()
+    yield
+    _reset_session()
+
+
 @pytest.fixture
 def download_helper():
     return DownloadHelper()
@@ -90,6 +99,22 @@ def test_http_downloader(mock_session, tmp_path):
     mock_session_instance.mount.assert_called()
 
 
+@patch('pis.util.download.requests.Session')
+def test_http_session_reused(mock_session):
+    assert http_session() is http_session()
+    mock_session.assert_called_once()
+
+
+@patch('pis.util.download.requests.Session')
+def test_http_session_reset(mock_session):
+    mock_session.side_effect = [Mock(), Mock()]
+
+    s1 = http_session()
+    _reset_session()
+
+    assert http_session() is not s1
+
+
 @patch('pis.util.download.open')
 @patch('pis.util.download.shutil.copyfileobj')
 @patch('pis.util.download.requests.Session')
@@ -2,9 +2,9 @@
 
 from pathlib import Path
 
-import requests
 from loguru import logger
 
+from pis.util.download import http_session
 from pis.util.fs import absolute_path
 
 REQUEST_TIMEOUT = 10
@@ -40,7 +40,7 @@ def file_size(source: str, destination: Path) -> bool:
     headers = {'accept-encoding': 'identity'}
 
     try:
-        resp = requests.head(
+        resp = http_session().head(
             source,
             headers=headers,
             allow_redirects=True,